@@ -1,4 +1,10 @@
 import argparse
+import asyncio
+
+from lxml import etree
+
+from .hnpx import parse_document
+from .tools import get_root_id, render_node
 
 
 def parse_args() -> argparse.Namespace:
@@ -57,11 +63,7 @@ def parse_args() -> argparse.Namespace:
 
 def render(args: argparse.Namespace) -> None:
     def render_fb2() -> str:
-        from lxml import etree
-
-        from .hnpx import parse_document
-
-        tree = parse_document(args.file)
+        tree = parse_document(args.file, readonly=True)
         root = tree.getroot()
 
         fb2 = etree.Element(
@@ -74,35 +76,29 @@ def render(args: argparse.Namespace) -> None:
         book_title.text = input("Title: ") if args.interactive else "Untitled"
         body = etree.SubElement(fb2, "body")
 
-        for chapter in root:
-            if chapter.tag == "summary":
-                continue
-            section = etree.SubElement(body, "section")
-            title = etree.SubElement(section, "title")
-            p = etree.SubElement(title, "p")
-            p.text = chapter.get("title")
-            is_first_sequence = True
-            for sequence in chapter:
-                if sequence.tag == "summary":
-                    continue
+        section = None
+        is_first_sequence = True
+        for _, node in etree.iterwalk(
+            root, events=("start",), tag=("chapter", "sequence", "paragraph")
+        ):
+            if node.tag == "chapter":
+                section = etree.SubElement(body, "section")
+                title = etree.SubElement(section, "title")
+                p = etree.SubElement(title, "p")
+                p.text = node.get("title")
+                is_first_sequence = True
+            elif node.tag == "sequence":
                 if not is_first_sequence:
                     sep_p = etree.SubElement(section, "p")
                     sep_p.text = "***"
                 is_first_sequence = False
-                for beat in sequence:
-                    if beat.tag == "summary":
-                        continue
-                    for paragraph in beat:
-                        if paragraph.tag == "summary":
-                            continue
-                        fb2_p = etree.SubElement(section, "p")
-                        fb2_p.text = (paragraph.text or "").strip()
+            else:
+                fb2_p = etree.SubElement(section, "p")
+                fb2_p.text = (node.text or "").strip()
 
         return etree.tostring(fb2, encoding="unicode", pretty_print=True)
 
     def render_plain() -> str:
-        from .tools import get_root_id, render_node
-
         root_id = get_root_id(args.file)
         return render_node(
             args.file,
@@ -124,8 +120,6 @@ def render(args: argparse.Namespace) -> None:
 
 
 def list_tools(args: argparse.Namespace) -> None:
-    import asyncio
-
     from hnpx_sdk.server import app
 
     async def f() -> None:
@@ -39,7 +39,7 @@ class InvalidHierarchyError(HNPXError):
 
 class ValidationError(HNPXError):
     def __init__(self, errors: list):
-        error_messages = "\n".join([str(e) for e in errors])
+        error_messages = "\n".join(map(str, errors))
         super().__init__(f"Schema validation failed:\n{error_messages}")
 
 
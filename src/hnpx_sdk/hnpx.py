@@ -1,8 +1,11 @@
-import random
+import copy
+import os
+import secrets
 import string
+import threading
 from functools import cache
 from pathlib import Path
-from typing import Optional
+from typing import AbstractSet, Optional
 
 from lxml import etree
 
@@ -10,48 +13,131 @@ from .exceptions import (
     ValidationError,
 )
 
+_PARSER = etree.XMLParser(
+    remove_blank_text=True,
+    resolve_entities=False,
+    load_dtd=False,
+    no_network=True,
+    collect_ids=False,
+)
+
+_XP_ALL_IDS = etree.XPath("//@id")
+_XP_NODE_BY_ID = etree.XPath("//*[@id=$node_id]")
+# Paragraph checks run after schema validation, so paragraphs are only found at this path.
+# Selects dialogue paragraphs without char and other paragraphs with char in one pass
+_XP_INVALID_CHAR_PARAGRAPHS = etree.XPath(
+    "/book/chapter/sequence/beat/paragraph"
+    '[(@mode="dialogue" and not(string(@char))) or (@char and not(@mode="dialogue"))]'
+)
+# First container without children other than summary (comments and processing
+# instructions count as children), one query per hierarchy level, ordered from the top
+_XP_FIRST_EMPTY_CONTAINER_BY_LEVEL = [
+    etree.XPath(
+        f"(descendant-or-self::{tag}"
+        "[not(*[not(self::summary)] | comment() | processing-instruction())])[1]"
+    )
+    for tag in ("book", "chapter", "sequence", "beat")
+]
+
+
+# Serializes validation against the shared schema, see validate_document
+_SCHEMA_LOCK = threading.Lock()
 
+
+@cache
 def load_schema() -> etree.XMLSchema:
-    """Load HNPX schema from resources directory"""
+    """Load HNPX schema from resources directory, compiled once per process"""
+    schema_path = Path(__file__).parent / "resources" / "HNPX.xml"
+    return etree.XMLSchema(etree.parse(str(schema_path), _PARSER))
 
-    @cache
-    def load_schema_doc() -> str:
-        schema_path = Path(__file__).parent / "resources" / "HNPX.xml"
-        return etree.parse(str(schema_path))
 
-    return etree.XMLSchema(load_schema_doc())
+# Parsed and validated trees, keyed by real path: {path: (version, tree)},
+# in least to most recently used order
+_PARSE_CACHE: dict[str, tuple[tuple, etree.ElementTree]] = {}
+_PARSE_CACHE_SIZE = 32
+# Guards the cache, so concurrent tool calls parse a document only once
+_PARSE_LOCK = threading.Lock()
+# Saves per real path, bumped by save_document, as a rewrite may keep both mtime
+# (coarse timestamps) and size. Per path, so a save leaves other documents cached
+_save_counts: dict[str, int] = {}
 
 
-def parse_document(file_path: str) -> etree.ElementTree:
-    """Parse XML file and return ElementTree"""
-    parser = etree.XMLParser(remove_blank_text=True)
-    tree = etree.parse(file_path, parser)
+def get_document_version(file_path: str) -> tuple:
+    """Get key that changes whenever the file contents may have changed
 
-    # Valudate document right after read
-    validate_document(tree)
+    Returns:
+        tuple: Real path, mtime, size and number of saves to it made by this process
+    """
+    key = os.path.realpath(file_path)
+    st = os.stat(key)
+    return (key, st.st_mtime_ns, st.st_size, _save_counts.get(key, 0))
+
+
+def _cache_tree(version: tuple, tree: etree.ElementTree) -> None:
+    key = version[0]
+    _PARSE_CACHE.pop(key, None)
+    if len(_PARSE_CACHE) >= _PARSE_CACHE_SIZE:
+        del _PARSE_CACHE[next(iter(_PARSE_CACHE))]
+    _PARSE_CACHE[key] = (version, tree)
+
+
+def _load_tree(file_path: str) -> etree.ElementTree:
+    """Parse and validate XML file, reusing the cached tree while the file is unchanged"""
+    with _PARSE_LOCK:
+        version = get_document_version(file_path)
+        cached = _PARSE_CACHE.pop(version[0], None)
+        if cached is not None and cached[0] == version:
+            # Re-insert as most recently used, the oldest entry is evicted first
+            _PARSE_CACHE[version[0]] = cached
+            return cached[1]
+
+        tree = etree.parse(version[0], _PARSER)
+
+        # Valudate document right after read
+        validate_document(tree)
+
+        _cache_tree(version, tree)
 
     return tree
 
 
+def parse_document(file_path: str, readonly: bool = False) -> etree.ElementTree:
+    """Parse XML file and return ElementTree
+
+    With readonly=True the shared cached tree is returned as is and must not be modified.
+    """
+    tree = _load_tree(file_path)
+    if readonly:
+        return tree
+
+    # Callers are free to modify the tree, so hand out a copy of the cached one
+    return copy.deepcopy(tree)
+
+
 def validate_document(tree: etree.ElementTree) -> None:
     """Validate document against schema, raise ValidationError if invalid"""
+    # Reject non-HNPX documents before running the whole schema over them
+    root_tag = tree.getroot().tag
+    if root_tag != "book":
+        raise ValidationError([f"Root element must be book, not {root_tag}"])
+
     schema = load_schema()
-    if not schema.validate(tree):
-        raise ValidationError(schema.error_log)
+    # The cached schema, and so its error_log, is shared between threads
+    with _SCHEMA_LOCK:
+        if not schema.validate(tree):
+            raise ValidationError(schema.error_log)
 
     error_log = []
-    # Check dialogue paragraphs have char attribute
-    for para in tree.xpath('//paragraph[@mode="dialogue"]'):
-        if not para.get("char"):
+    for para in _XP_INVALID_CHAR_PARAGRAPHS(tree):
+        mode = para.get("mode")
+        if mode == "dialogue":
+            # Dialogue paragraphs must have char attribute
             error_log.append(
                 f"Dialogue paragraph {para.get('id')} missing char attribute"
             )
-
-    # Check non-dialogue shouldn't have char
-    for para in tree.xpath('//paragraph[@char][not(@mode="dialogue")]'):
-        error_log.append(
-            f"Paragraph {para.get('id')} has char but mode is {para.get('mode')}"
-        )
+        else:
+            # Non-dialogue paragraphs shouldn't have char
+            error_log.append(f"Paragraph {para.get('id')} has char but mode is {mode}")
 
     if len(error_log) > 0:
         raise ValidationError(error_log)
@@ -65,30 +151,83 @@ def save_document(tree: etree.ElementTree, file_path: str) -> None:
 
     tree.write(file_path, pretty_print=True, encoding="UTF-8", xml_declaration=True)
 
+    key = os.path.realpath(file_path)
+    with _PARSE_LOCK:
+        _save_counts[key] = _save_counts.get(key, 0) + 1
+
+        # Keep what was just written, so reading it back needs no parsing or validation.
+        # The caller may go on modifying its tree, hence the copy
+        _cache_tree(get_document_version(file_path), copy.deepcopy(tree))
+
 
 def get_all_ids(tree: etree.ElementTree) -> set:
     """Get all ID attributes in document"""
-    return set(tree.xpath("//@id"))
+    return set(_XP_ALL_IDS(tree))
+
+
+_ID_CHARS = string.ascii_lowercase + string.digits
+_ID_LENGTH = 6
+# Random bytes are mapped onto ID characters, bytes past the last full
+# multiple of len(_ID_CHARS) are dropped to keep the distribution uniform
+_ID_BYTE_TABLE = bytes(ord(_ID_CHARS[b % len(_ID_CHARS)]) for b in range(256))
+_ID_BYTE_REJECTED = bytes(range(256 - 256 % len(_ID_CHARS), 256))
+_id_pool: list[str] = []
+# Tools may run in worker threads, so refill and pop must happen together
+_ID_POOL_LOCK = threading.Lock()
+
+
+def _random_id() -> str:
+    """Take random ID from the pool, refilling it in bulk when empty"""
+    with _ID_POOL_LOCK:
+        if not _id_pool:
+            chars = secrets.token_bytes(4096).translate(
+                _ID_BYTE_TABLE, _ID_BYTE_REJECTED
+            )
+            _id_pool.extend(
+                chars[i : i + _ID_LENGTH].decode("ascii")
+                for i in range(0, len(chars) - _ID_LENGTH + 1, _ID_LENGTH)
+            )
+        return _id_pool.pop()
 
 
-def generate_unique_id(existing_ids: set) -> str:
+def generate_unique_id(existing_ids: AbstractSet[str]) -> str:
     """Generate unique 6-character ID"""
-    chars = string.ascii_lowercase + string.digits
     while True:
-        new_id = "".join(random.choice(chars) for _ in range(6))
+        new_id = _random_id()
         if new_id not in existing_ids:
             return new_id
 
 
 def find_node(tree: etree.ElementTree, node_id: str) -> Optional[etree.Element]:
     """Find node by ID, return None if not found"""
-    nodes = tree.xpath(f"//*[@id='{node_id}']")
+    nodes = _XP_NODE_BY_ID(tree, node_id=node_id)
     return nodes[0] if nodes else None
 
 
+def get_id_index(tree: etree.ElementTree) -> dict[str, etree.Element]:
+    """Map every ID in document to its node (single pass, for repeated lookups)"""
+    return {node.get("id"): node for node in tree.iter() if node.get("id") is not None}
+
+
+_CHILD_TAGS = ("chapter", "sequence", "beat", "paragraph")
+
+
+def get_children(node: etree.Element) -> list[etree.Element]:
+    """Get children excluding summary"""
+    # Tag filtering happens inside lxml instead of comparing tags in Python
+    return list(node.iterchildren(*_CHILD_TAGS))
+
+
+def get_summary(node: etree.Element) -> Optional[etree.Element]:
+    """Get summary child, or None if node has none"""
+    # Summary is the first child in valid documents, so the scan stops right away
+    return next(node.iterchildren("summary"), None)
+
+
 def get_child_count(node: etree.Element) -> int:
     """Get count of children excluding summary"""
-    return len([child for child in node if child.tag != "summary"])
+    # Comments and processing instructions count too, like in find_first_empty_container
+    return sum(1 for child in node if child.tag != "summary")
 
 
 def find_first_empty_container(
@@ -105,22 +244,17 @@ def find_first_empty_container(
     if start_node is None:
         start_node = tree.getroot()
 
-    queue = [start_node]
-
-    while queue:
-        node = queue.pop(0)
-
-        # Check if this is a container node
-        if node.tag in ["book", "chapter", "sequence", "beat"]:
-            # Check if it has required children (excluding summary)
-            if get_child_count(node) == 0:
-                return node
-        elif node.tag == "paragraph":
-            # Check if paragraph has no text content
-            if not (node.text or "").strip():
-                return node
-
-        # Add children to queue (BFS)
-        queue.extend([child for child in node if child.tag != "summary"])
+    # Each node type sits at a fixed depth, so BFS order is level by level,
+    # then document order within a level
+    for xpath in _XP_FIRST_EMPTY_CONTAINER_BY_LEVEL:
+        empty_nodes = xpath(start_node)
+        if empty_nodes:
+            return empty_nodes[0]
+
+    # Paragraphs are the deepest level. str.strip() also treats Unicode whitespace
+    # as blank, unlike XPath normalize-space(), matching render_node
+    for paragraph in start_node.iter("paragraph"):
+        if not (paragraph.text or "").strip():
+            return paragraph
 
     return None
@@ -1,5 +1,5 @@
-import random
-import string
+import copy
+from functools import lru_cache
 from typing import Any, Optional
 
 from lxml import etree
@@ -14,6 +14,14 @@ from .exceptions import (
     NodeNotFoundError,
 )
 
+# Tags each element may directly contain (besides summary)
+_VALID_CHILDREN = {
+    "book": frozenset({"chapter"}),
+    "chapter": frozenset({"sequence"}),
+    "sequence": frozenset({"beat"}),
+    "beat": frozenset({"paragraph"}),
+}
+
 
 def create_document(file_path: str) -> str:
     """Create a new empty HNPX document
@@ -22,7 +30,7 @@ def create_document(file_path: str) -> str:
         file_path (str): Path where the new HNPX document will be created
     """
     # Generate initial book ID
-    book_id = "".join(random.choices(string.ascii_lowercase + string.digits, k=6))
+    book_id = hnpx.generate_unique_id(set())
 
     # Create minimal document
     book = etree.Element("book", id=book_id)
@@ -45,7 +53,7 @@ def get_root_id(file_path: str) -> str:
     Returns:
         str: ID of the book node
     """
-    tree = hnpx.parse_document(file_path)
+    tree = hnpx.parse_document(file_path, readonly=True)
     root = tree.getroot()
     return root.get("id")
 
@@ -60,7 +68,7 @@ def get_empty(file_path: str, node_id: str) -> str:
     Returns:
         str: XML representation of the next empty container node or a message if none found
     """
-    tree = hnpx.parse_document(file_path)
+    tree = hnpx.parse_document(file_path, readonly=True)
     start_node = hnpx.find_node(tree, node_id)
 
     if start_node is None:
@@ -72,13 +80,41 @@ def get_empty(file_path: str, node_id: str) -> str:
         return f"No empty containers found within node {node_id}"
 
     # Return node XML (like get_node)
-    return etree.tostring(empty_node, encoding="unicode", method="html")
+    return etree.tostring(
+        empty_node, encoding="unicode", method="html", with_tail=False
+    )
 
 
-def _remove_children(node: Any) -> None:
-    for child in node:
-        if child.tag != "summary":
-            node.remove(child)
+def _remove_children(node: Any) -> int:
+    # Not get_children: comments and processing instructions have to go as well
+    children = [child for child in node if child.tag != "summary"]
+    for child in children:
+        node.remove(child)
+    return len(children)
+
+
+def _copy_without_children(node: etree.Element) -> etree.Element:
+    """Copy node with its attributes, text and summary, but no other children"""
+    node_copy = etree.Element(node.tag, node.attrib)
+    node_copy.text = node.text
+    summary = hnpx.get_summary(node)
+    if summary is not None:
+        etree.SubElement(node_copy, "summary").text = summary.text
+    return node_copy
+
+
+@lru_cache(maxsize=1024)
+def _get_node_xml(document_version: tuple, node_id: str) -> str:
+    tree = hnpx.parse_document(document_version[0], readonly=True)
+    node = hnpx.find_node(tree, node_id)
+
+    if node is None:
+        raise NodeNotFoundError(node_id)
+
+    # Return node with all attributes and summary child
+    return etree.tostring(
+        _copy_without_children(node), encoding="unicode", method="html"
+    )
 
 
 def get_node(file_path: str, node_id: str) -> str:
@@ -91,16 +127,7 @@ def get_node(file_path: str, node_id: str) -> str:
     Returns:
         str: XML representation of the node with its attributes and summary child only
     """
-    tree = hnpx.parse_document(file_path)
-    node = hnpx.find_node(tree, node_id)
-
-    if node is None:
-        raise NodeNotFoundError(node_id)
-
-    _remove_children(node)
-
-    # Return node with all attributes and summary child
-    return etree.tostring(node, encoding="unicode", method="html")
+    return _get_node_xml(hnpx.get_document_version(file_path), node_id)
 
 
 def get_subtree(file_path: str, node_id: str, pruning_level: str = "full") -> str:
@@ -114,7 +141,7 @@ def get_subtree(file_path: str, node_id: str, pruning_level: str = "full") -> st
     Returns:
         str: XML representation of the node and its descendants, pruned to specified depth
     """
-    tree = hnpx.parse_document(file_path)
+    tree = hnpx.parse_document(file_path, readonly=True)
     node = hnpx.find_node(tree, node_id)
 
     if node is None:
@@ -122,7 +149,7 @@ def get_subtree(file_path: str, node_id: str, pruning_level: str = "full") -> st
 
     # If no pruning needed, return full subtree
     if pruning_level == "full":
-        return etree.tostring(node, encoding="unicode", method="html")
+        return etree.tostring(node, encoding="unicode", method="html", with_tail=False)
 
     # Validate level parameter
     valid_levels = ["book", "chapter", "sequence", "beat", "full"]
@@ -137,30 +164,20 @@ def get_subtree(file_path: str, node_id: str, pruning_level: str = "full") -> st
     max_depth = hierarchy[pruning_level]
 
     # Create a copy of the node to avoid modifying the original
-    node_copy = etree.Element(node.tag, node.attrib)
-    for child in node:
-        node_copy.append(etree.fromstring(etree.tostring(child, encoding="unicode")))
+    node_copy = copy.deepcopy(node)
 
-    def prune_tree(node: etree.Element, current_depth: int) -> None:
-        """Recursively remove nodes beyond max_depth"""
+    # Remove nodes beyond max_depth, walking the copy with an explicit stack
+    # (start depth is determined by node type)
+    stack = [(node_copy, hierarchy.get(node.tag, 0))]
+    while stack:
+        current, current_depth = stack.pop()
         if current_depth >= max_depth:
             # Remove all children except summary
-            children_to_remove = []
-            for child in node:
-                if child.tag != "summary":
-                    children_to_remove.append(child)
-
-            for child in children_to_remove:
-                node.remove(child)
+            _remove_children(current)
         else:
-            # Recursively process children
-            for child in list(node):
-                if child.tag in hierarchy:
-                    prune_tree(child, current_depth + 1)
-
-    # Start pruning from the node (determine depth based on node type)
-    node_depth = hierarchy.get(node.tag, 0)
-    prune_tree(node_copy, node_depth)
+            stack.extend(
+                (child, current_depth + 1) for child in hnpx.get_children(current)
+            )
 
     # Return the pruned tree as XML
     return etree.tostring(node_copy, encoding="unicode", pretty_print=True)
@@ -176,7 +193,7 @@ def get_children(file_path: str, node_id: str) -> str:
     Returns:
         str: Concatenated XML representation of all direct child nodes
     """
-    tree = hnpx.parse_document(file_path)
+    tree = hnpx.parse_document(file_path, readonly=True)
     parent = hnpx.find_node(tree, node_id)
 
     if parent is None:
@@ -184,11 +201,12 @@ def get_children(file_path: str, node_id: str) -> str:
 
     # Return concatenated XML of all direct children
     children_xml = []
-    for child in parent:
-        if child.tag == "summary":
-            continue
-        _remove_children(child)
-        children_xml.append(etree.tostring(child, encoding="unicode", method="html"))
+    for child in hnpx.get_children(parent):
+        children_xml.append(
+            etree.tostring(
+                _copy_without_children(child), encoding="unicode", method="html"
+            )
+        )
 
     return "\n".join(children_xml)
 
@@ -203,23 +221,23 @@ def get_path(file_path: str, node_id: str) -> str:
     Returns:
         str: Concatenated XML representation of all nodes in the path from root to target
     """
-    tree = hnpx.parse_document(file_path)
+    tree = hnpx.parse_document(file_path, readonly=True)
     node = hnpx.find_node(tree, node_id)
 
     if node is None:
         raise NodeNotFoundError(node_id)
 
-    # Collect ancestors
-    ancestors = []
-    current = node
-    while current is not None:
-        ancestors.insert(0, current)
-        current = current.getparent()
+    # Collect ancestors, from root down to the node itself
+    ancestors = list(node.iterancestors())
+    ancestors.reverse()
+    ancestors.append(node)
 
     # Return concatenated XML of all ancestors
     path_xml = []
     for ancestor in ancestors:
-        path_xml.append(etree.tostring(ancestor, encoding="unicode", method="html"))
+        path_xml.append(
+            etree.tostring(ancestor, encoding="unicode", method="html", with_tail=False)
+        )
 
     return "\n".join(path_xml)
 
@@ -232,27 +250,17 @@ def _create_element(
     summary_text: str,
 ) -> str:
     """Generic element creation helper"""
-    parent = hnpx.find_node(tree, parent_id)
+    id_index = hnpx.get_id_index(tree)
+    parent = id_index.get(parent_id)
     if parent is None:
         raise NodeNotFoundError(parent_id)
 
     # Check hierarchy
-    valid_hierarchy = {
-        "book": ["chapter"],
-        "chapter": ["sequence"],
-        "sequence": ["beat"],
-        "beat": ["paragraph"],
-    }
-
-    if (
-        parent.tag not in valid_hierarchy
-        or element_tag not in valid_hierarchy[parent.tag]
-    ):
+    if element_tag not in _VALID_CHILDREN.get(parent.tag, ()):
         raise InvalidHierarchyError(parent.tag, element_tag)
 
     # Generate unique ID
-    existing_ids = hnpx.get_all_ids(tree)
-    new_id = hnpx.generate_unique_id(existing_ids)
+    new_id = hnpx.generate_unique_id(id_index.keys())
     attributes["id"] = new_id
 
     # Create element
@@ -363,15 +371,15 @@ def create_paragraph(
         raise MissingAttributeError("char")
 
     # Create the paragraph with text content
-    parent = hnpx.find_node(tree, parent_id)
+    id_index = hnpx.get_id_index(tree)
+    parent = id_index.get(parent_id)
     if parent is None:
         raise NodeNotFoundError(parent_id)
 
     if parent.tag != "beat":
         raise InvalidParentError(parent.tag, "beat")
 
-    existing_ids = hnpx.get_all_ids(tree)
-    new_id = hnpx.generate_unique_id(existing_ids)
+    new_id = hnpx.generate_unique_id(id_index.keys())
     attributes["id"] = new_id
 
     paragraph = etree.SubElement(parent, "paragraph", **attributes)
@@ -404,8 +412,7 @@ def edit_node_attributes(file_path: str, node_id: str, attributes: dict) -> str:
             )
 
         if value is None or value == "":
-            if key in node.attrib:
-                del node.attrib[key]
+            node.attrib.pop(key, None)
         else:
             node.set(key, value)
 
@@ -422,10 +429,11 @@ def remove_nodes(file_path: str, node_ids: list) -> str:
         node_ids (list): List of node IDs to remove
     """
     tree = hnpx.parse_document(file_path)
+    id_index = hnpx.get_id_index(tree)
 
     nodes_removed = 0
     for node_id in node_ids:
-        node = hnpx.find_node(tree, node_id)
+        node = id_index.get(node_id)
 
         if node is None:
             raise NodeNotFoundError(node_id)
@@ -439,6 +447,10 @@ def remove_nodes(file_path: str, node_ids: list) -> str:
         parent.remove(node)
         nodes_removed += 1
 
+        # Removed descendants must no longer be found
+        for descendant in node.iter():
+            id_index.pop(descendant.get("id"), None)
+
     hnpx.save_document(tree, file_path)
 
     return f"Removed {nodes_removed} nodes and their descendants"
@@ -458,24 +470,16 @@ def reorder_children(file_path: str, parent_id: str, child_ids: list) -> str:
     if parent is None:
         raise NodeNotFoundError(parent_id)
 
-    # Get current children (excluding summary)
-    current_children = [child for child in parent if child.tag != "summary"]
-    current_ids = [child.get("id") for child in current_children]
+    # Map current children (excluding summary) by ID
+    child_map = {child.get("id"): child for child in hnpx.get_children(parent)}
 
     # Validate input
-    if set(child_ids) != set(current_ids):
+    if set(child_ids) != child_map.keys():
         raise InvalidOperationError(
             "reorder_children", "child_ids must contain all existing child IDs"
         )
 
-    # Create mapping and reorder
-    child_map = {child.get("id"): child for child in current_children}
-
-    # Remove all children (except summary)
-    for child in current_children:
-        parent.remove(child)
-
-    # Add back in new order
+    # Appending an existing child moves it, so this leaves them in the new order
     for child_id in child_ids:
         parent.append(child_map[child_id])
 
@@ -504,7 +508,7 @@ def edit_summary(file_path: str, node_id: str, new_summary: str) -> str:
         )
 
     # Find the summary child element
-    summary_elem = node.find("summary")
+    summary_elem = hnpx.get_summary(node)
     if summary_elem is None:
         # Create summary if it doesn't exist (shouldn't happen with valid HNPX)
         summary_elem = etree.SubElement(node, "summary")
@@ -554,23 +558,18 @@ def move_nodes(file_path: str, node_ids: list, new_parent_id: str) -> str:
         new_parent_id (str): ID of the new parent node
     """
     tree = hnpx.parse_document(file_path)
-    new_parent = hnpx.find_node(tree, new_parent_id)
+    id_index = hnpx.get_id_index(tree)
+    new_parent = id_index.get(new_parent_id)
 
     if new_parent is None:
         raise NodeNotFoundError(new_parent_id)
 
     # Check hierarchy validity for new parent
-    valid_hierarchy = {
-        "book": ["chapter"],
-        "chapter": ["sequence"],
-        "sequence": ["beat"],
-        "beat": ["paragraph"],
-        "paragraph": [],
-    }
+    valid_children = _VALID_CHILDREN.get(new_parent.tag, ())
 
     nodes_moved = 0
     for node_id in node_ids:
-        node = hnpx.find_node(tree, node_id)
+        node = id_index.get(node_id)
         if node is None:
             raise NodeNotFoundError(node_id)
 
@@ -579,7 +578,7 @@ def move_nodes(file_path: str, node_ids: list, new_parent_id: str) -> str:
             raise InvalidOperationError("move_nodes", "Cannot move book element")
 
         # Check hierarchy validity
-        if node.tag not in valid_hierarchy[new_parent.tag]:
+        if node.tag not in valid_children:
             raise InvalidHierarchyError(new_parent.tag, node.tag)
 
         old_parent = node.getparent()
@@ -605,13 +604,8 @@ def remove_node_children(file_path: str, node_id: str) -> str:
     if node is None:
         raise NodeNotFoundError(node_id)
 
-    children_count = 0
-
     # Remove all children except summary
-    for child in list(node):
-        if child.tag != "summary":
-            node.remove(child)
-            children_count += 1
+    children_count = _remove_children(node)
 
     hnpx.save_document(tree, file_path)
 
@@ -622,33 +616,29 @@ def _render_paragraphs_recursive(
     node: etree.Element,
     show_ids: bool,
     show_markers: bool,
+    parts: list[str],
     is_first_child: bool = False,
-) -> str:
-    """Recursively print all paragraphs"""
+) -> None:
+    """Recursively collect all paragraphs into parts"""
 
-    result = ""
     if node.tag == "paragraph":
-        node_id = node.get("id")
         rendered_text = (node.text or "").strip()
         if rendered_text:
             if show_ids:
-                result += f"[{node_id}] {rendered_text}\n\n"
-            else:
-                result += rendered_text + "\n\n"
+                parts.append(f"[{node.get('id')}] ")
+            parts.append(rendered_text)
+            parts.append("\n\n")
     else:
         if node.tag == "chapter":
-            result += f"=== {node.get('title')} ===\n\n"
+            parts.append(f"=== {node.get('title')} ===\n\n")
         elif node.tag == "sequence" and not is_first_child:
-            result += "***\n\n"
+            parts.append("***\n\n")
         is_first_child = True
-        for child in node:
-            if child.tag != "summary":
-                result += _render_paragraphs_recursive(
-                    child, show_ids, show_markers, is_first_child
-                )
-                is_first_child = False
-
-    return result
+        for child in hnpx.get_children(node):
+            _render_paragraphs_recursive(
+                child, show_ids, show_markers, parts, is_first_child
+            )
+            is_first_child = False
 
 
 def render_node(
@@ -665,10 +655,12 @@ def render_node(
     Returns:
         str: Formatted text representation the node
     """
-    tree = hnpx.parse_document(file_path)
+    tree = hnpx.parse_document(file_path, readonly=True)
     node = hnpx.find_node(tree, node_id)
 
     if node is None:
         raise NodeNotFoundError(node_id)
 
-    return _render_paragraphs_recursive(node, show_ids, show_markers).strip()
+    parts = []
+    _render_paragraphs_recursive(node, show_ids, show_markers, parts)
+    return "".join(parts).strip()
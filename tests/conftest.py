@@ -1,7 +1,10 @@
 import pytest
+import shutil
 import tempfile
 from pathlib import Path
 
+import hnpx_sdk.hnpx as hnpx
+
 
 @pytest.fixture
 def temp_file():
@@ -13,25 +16,44 @@ def temp_file():
     Path(temp_path).unlink(missing_ok=True)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def complete_xml_path():
     """Path to the complete.xml test file"""
-    return Path(__file__).parent / "resources" / "complete.xml"
+    return str(Path(__file__).parent / "resources" / "complete.xml")
 
 
 @pytest.fixture
+def complete_temp_file(temp_file, complete_xml_path):
+    """Temporary copy of the complete.xml test file"""
+    shutil.copyfile(complete_xml_path, temp_file)
+    return temp_file
+
+
+@pytest.fixture(scope="session")
 def incomplete_xml_path():
     """Path to the incomplete.xml test file"""
-    return Path(__file__).parent / "resources" / "incomplete.xml"
+    return str(Path(__file__).parent / "resources" / "incomplete.xml")
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mixed_xml_path():
     """Path to the mixed.xml test file"""
-    return Path(__file__).parent / "resources" / "mixed.xml"
+    return str(Path(__file__).parent / "resources" / "mixed.xml")
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def unicode_xml_path():
     """Path to the unicode.xml test file"""
-    return Path(__file__).parent / "resources" / "unicode.xml"
+    return str(Path(__file__).parent / "resources" / "unicode.xml")
+
+
+@pytest.fixture(scope="session")
+def complete_tree(complete_xml_path):
+    """Parsed complete.xml shared by tests that don't modify it"""
+    return hnpx.parse_document(complete_xml_path)
+
+
+@pytest.fixture(scope="session")
+def incomplete_tree(incomplete_xml_path):
+    """Parsed incomplete.xml shared by tests that don't modify it"""
+    return hnpx.parse_document(incomplete_xml_path)
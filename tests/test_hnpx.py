@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 from lxml import etree
 import hnpx_sdk.hnpx as hnpx
@@ -5,54 +7,132 @@ from hnpx_sdk.exceptions import ValidationError
 
 
 def test_parse_document(complete_xml_path):
-    tree = hnpx.parse_document(str(complete_xml_path))
+    tree = hnpx.parse_document(complete_xml_path)
     assert isinstance(tree, etree.ElementTree)
     assert tree.getroot().tag == "book"
 
 
-def test_validate_document_valid(complete_xml_path):
-    tree = hnpx.parse_document(str(complete_xml_path))
-    hnpx.validate_document(tree)
+def test_parse_document_cached_copy(complete_xml_path):
+    tree1 = hnpx.parse_document(complete_xml_path)
+    tree1.getroot().set("id", "zzzzzz")
 
+    tree2 = hnpx.parse_document(complete_xml_path)
+    assert tree2.getroot().get("id") == "glyjor"
 
-def test_validate_document_invalid_missing_attributes():
-    invalid_xml = """<book>
-  <summary>Test book</summary>
-  <chapter>
-    <summary>Test chapter</summary>
-  </chapter>
-</book>"""
 
-    tree = etree.fromstring(invalid_xml)
-    tree = etree.ElementTree(tree)
+def test_parse_document_readonly(complete_xml_path):
+    tree1 = hnpx.parse_document(complete_xml_path, readonly=True)
+    tree2 = hnpx.parse_document(complete_xml_path, readonly=True)
 
-    with pytest.raises(ValidationError):
-        hnpx.validate_document(tree)
+    assert tree1 is tree2
 
 
-def test_validate_document_invalid_wrong_hierarchy():
-    invalid_xml = """<book id="test01">
-  <summary>Test book</summary>
-  <paragraph id="para01">
-    Test paragraph
-  </paragraph>
-</book>"""
+def test_parse_document_after_save(complete_temp_file):
+    tree = hnpx.parse_document(complete_temp_file)
+    hnpx.find_node(tree, "3295p0").set("title", "Parkes")
+    hnpx.save_document(tree, complete_temp_file)
 
-    tree = etree.fromstring(invalid_xml)
-    tree = etree.ElementTree(tree)
+    tree = hnpx.parse_document(complete_temp_file)
+    assert hnpx.find_node(tree, "3295p0").get("title") == "Parkes"
+
+
+def test_parse_document_cached_after_other_save(complete_xml_path, complete_temp_file):
+    tree = hnpx.parse_document(complete_xml_path, readonly=True)
+    hnpx.save_document(hnpx.parse_document(complete_temp_file), complete_temp_file)
+
+    assert hnpx.parse_document(complete_xml_path, readonly=True) is tree
 
-    with pytest.raises(ValidationError):
-        hnpx.validate_document(tree)
 
+def test_parse_document_cache_evicts_least_recently_used(
+    monkeypatch, complete_xml_path, incomplete_xml_path, mixed_xml_path
+):
+    monkeypatch.setattr(hnpx, "_PARSE_CACHE", {})
+    monkeypatch.setattr(hnpx, "_PARSE_CACHE_SIZE", 2)
 
-def test_validate_document_invalid_duplicate_ids():
-    invalid_xml = """<book id="test01">
+    complete = hnpx.parse_document(complete_xml_path, readonly=True)
+    incomplete = hnpx.parse_document(incomplete_xml_path, readonly=True)
+    assert hnpx.parse_document(complete_xml_path, readonly=True) is complete
+    hnpx.parse_document(mixed_xml_path, readonly=True)
+
+    assert hnpx.parse_document(complete_xml_path, readonly=True) is complete
+    assert hnpx.parse_document(incomplete_xml_path, readonly=True) is not incomplete
+
+
+def test_load_schema_cached():
+    assert hnpx.load_schema() is hnpx.load_schema()
+
+
+def test_validate_document_valid(complete_tree):
+    hnpx.validate_document(complete_tree)
+
+
+@pytest.mark.parametrize(
+    "invalid_xml",
+    [
+        # Wrong root
+        """<chapter id="test01" title="Test chapter">
+  <summary>Test chapter</summary>
+</chapter>""",
+        # Missing attributes
+        """<book>
+  <summary>Test book</summary>
+  <chapter>
+    <summary>Test chapter</summary>
+  </chapter>
+</book>""",
+        # Wrong hierarchy
+        """<book id="test01">
+  <summary>Test book</summary>
+  <paragraph id="para01">
+    Test paragraph
+  </paragraph>
+</book>""",
+        # Duplicate IDs
+        """<book id="test01">
   <summary>Test book</summary>
   <chapter id="test01">
     <summary>Test chapter</summary>
   </chapter>
-</book>"""
-
+</book>""",
+        # Dialogue without char
+        """<book id="test01">
+  <summary>Test book</summary>
+  <chapter id="test02" title="Test chapter">
+    <summary>Test chapter</summary>
+    <sequence id="test03">
+      <summary>Test sequence</summary>
+      <beat id="test04">
+        <summary>Test beat</summary>
+        <paragraph id="test05" mode="dialogue">Test paragraph</paragraph>
+      </beat>
+    </sequence>
+  </chapter>
+</book>""",
+        # Char without dialogue
+        """<book id="test01">
+  <summary>Test book</summary>
+  <chapter id="test02" title="Test chapter">
+    <summary>Test chapter</summary>
+    <sequence id="test03">
+      <summary>Test sequence</summary>
+      <beat id="test04">
+        <summary>Test beat</summary>
+        <paragraph id="test05" mode="narration" char="poirot">Test paragraph</paragraph>
+      </beat>
+    </sequence>
+  </chapter>
+</book>""",
+    ],
+    ids=[
+        "wrong_root",
+        "missing_attributes",
+        "wrong_hierarchy",
+        "duplicate_ids",
+        "dialogue_no_char",
+        "char_no_dialogue",
+    ],
+)
+def test_validate_document_invalid(invalid_xml):
     tree = etree.fromstring(invalid_xml)
     tree = etree.ElementTree(tree)
 
@@ -60,6 +140,23 @@ def test_validate_document_invalid_duplicate_ids():
         hnpx.validate_document(tree)
 
 
+def test_validate_document_threads():
+    invalid = etree.ElementTree(etree.fromstring("<book><summary>x</summary></book>"))
+    valid = etree.ElementTree(
+        etree.fromstring('<book id="test01"><summary>x</summary></book>')
+    )
+
+    def validate(_):
+        for _ in range(5000):
+            # Error must come from this document, not from a concurrent validation
+            with pytest.raises(ValidationError, match="'id'"):
+                hnpx.validate_document(invalid)
+            hnpx.validate_document(valid)
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        list(executor.map(validate, range(6)))
+
+
 def test_save_document(temp_file):
     book = etree.Element("book", id="test01")
     summary = etree.SubElement(book, "summary")
@@ -72,9 +169,8 @@ def test_save_document(temp_file):
     assert saved_tree.getroot().get("id") == "test01"
 
 
-def test_get_all_ids(complete_xml_path):
-    tree = hnpx.parse_document(str(complete_xml_path))
-    ids = hnpx.get_all_ids(tree)
+def test_get_all_ids(complete_tree):
+    ids = hnpx.get_all_ids(complete_tree)
 
     expected_ids = {
         "glyjor",
@@ -99,52 +195,125 @@ def test_generate_unique_id():
     assert all(c.islower() or c.isdigit() for c in new_id)
 
 
-def test_find_node_exists(complete_xml_path):
-    tree = hnpx.parse_document(str(complete_xml_path))
-    node = hnpx.find_node(tree, "glyjor")
+def test_find_node_exists(complete_tree):
+    node = hnpx.find_node(complete_tree, "glyjor")
 
     assert node is not None
     assert node.tag == "book"
     assert node.get("id") == "glyjor"
 
 
-def test_find_node_not_exists(complete_xml_path):
-    tree = hnpx.parse_document(str(complete_xml_path))
-    node = hnpx.find_node(tree, "nonexistent")
+def test_find_node_not_exists(complete_tree):
+    node = hnpx.find_node(complete_tree, "nonexistent")
 
     assert node is None
+    assert hnpx.find_node(complete_tree, "it's") is None
+
+
+def test_get_children(complete_tree):
+    beat = hnpx.find_node(complete_tree, "gr5peb")
+    children = hnpx.get_children(beat)
+
+    assert [child.get("id") for child in children] == [
+        "uvxuqh",
+        "gu81br",
+        "ef955x",
+        "bqrrw4",
+        "nxf930",
+    ]
+
 
+def test_get_summary(complete_tree):
+    sequence = hnpx.find_node(complete_tree, "104lac")
+    paragraph = hnpx.find_node(complete_tree, "uvxuqh")
 
-def test_get_child_count(complete_xml_path):
-    tree = hnpx.parse_document(str(complete_xml_path))
-    book = hnpx.find_node(tree, "glyjor")
-    chapter = hnpx.find_node(tree, "3295p0")
+    assert hnpx.get_summary(sequence).text == "The interrogation of Parker begins."
+    assert hnpx.get_summary(paragraph) is None
+
+
+def test_get_child_count(complete_tree):
+    book = hnpx.find_node(complete_tree, "glyjor")
+    chapter = hnpx.find_node(complete_tree, "3295p0")
 
     assert hnpx.get_child_count(book) == 1
     assert hnpx.get_child_count(chapter) == 1
 
 
-def test_find_first_empty_container_complete(complete_xml_path):
-    tree = hnpx.parse_document(str(complete_xml_path))
-    empty = hnpx.find_first_empty_container(tree)
+def test_get_child_count_comment(mixed_xml_path):
+    tree = hnpx.parse_document(mixed_xml_path, readonly=True)
+    beat = hnpx.find_node(tree, "tkzmbn")
+
+    # Beat with only a comment is not empty, so its child count is not 0 either
+    assert hnpx.get_child_count(beat) == 1
+    assert hnpx.find_first_empty_container(tree, beat) is None
+
+
+def test_find_first_empty_container_complete(complete_tree):
+    empty = hnpx.find_first_empty_container(complete_tree)
 
     assert empty is None
 
 
-def test_find_first_empty_container_incomplete(incomplete_xml_path):
-    tree = hnpx.parse_document(str(incomplete_xml_path))
-    empty = hnpx.find_first_empty_container(tree)
+@pytest.mark.parametrize("start_id", [None, "3295p0"])
+def test_find_first_empty_container_incomplete(incomplete_tree, start_id):
+    start_node = hnpx.find_node(incomplete_tree, start_id) if start_id else None
+    empty = hnpx.find_first_empty_container(incomplete_tree, start_node)
 
     assert empty is not None
     assert empty.tag == "beat"
     assert empty.get("id") == "gr5peb"
 
 
-def test_find_first_empty_container_with_start_node(incomplete_xml_path):
-    tree = hnpx.parse_document(str(incomplete_xml_path))
-    chapter = hnpx.find_node(tree, "3295p0")
-    empty = hnpx.find_first_empty_container(tree, chapter)
+def test_find_first_empty_container_unicode_whitespace():
+    tree = etree.ElementTree(etree.fromstring("""<book id="test01">
+  <summary>Test book</summary>
+  <chapter id="test02" title="Test chapter">
+    <summary>Test chapter</summary>
+    <sequence id="test03">
+      <summary>Test sequence</summary>
+      <beat id="test04">
+        <summary>Test beat</summary>
+        <paragraph id="test05">\u3000 </paragraph>
+      </beat>
+    </sequence>
+  </chapter>
+</book>"""))
+    empty = hnpx.find_first_empty_container(tree)
 
     assert empty is not None
-    assert empty.tag == "beat"
-    assert empty.get("id") == "gr5peb"
+    assert empty.get("id") == "test05"
+
+
+def test_find_first_empty_container_level_order():
+    tree = etree.ElementTree(etree.fromstring("""<book id="test01">
+  <summary>Test book</summary>
+  <chapter id="test02" title="Test chapter">
+    <summary>Test chapter</summary>
+    <sequence id="test03">
+      <summary>Test sequence</summary>
+      <beat id="test04">
+        <summary>Test beat</summary>
+        <paragraph id="test05"> </paragraph>
+      </beat>
+      <beat id="test06">
+        <summary>Test beat</summary>
+        <!-- Comment counts as content -->
+      </beat>
+      <beat id="test07">
+        <summary>Test beat</summary>
+      </beat>
+    </sequence>
+  </chapter>
+</book>"""))
+    empty = hnpx.find_first_empty_container(tree)
+
+    # Empty beat wins over the earlier empty paragraph, as it is one level higher
+    assert empty is not None
+    assert empty.get("id") == "test07"
+
+
+def test_get_id_index(complete_tree):
+    id_index = hnpx.get_id_index(complete_tree)
+
+    assert set(id_index) == hnpx.get_all_ids(complete_tree)
+    assert id_index["gr5peb"].tag == "beat"
@@ -1,3 +1,5 @@
+import shutil
+
 import pytest
 
 import hnpx_sdk.tools as tools
@@ -13,7 +15,7 @@ from hnpx_sdk.exceptions import (
 def test_create_document(temp_file):
     tools.create_document(temp_file)
 
-    tree = tools.hnpx.parse_document(temp_file)
+    tree = tools.hnpx.parse_document(temp_file, readonly=True)
     assert tree.getroot().tag == "book"
     assert tree.getroot().get("id") is not None
 
@@ -24,25 +26,31 @@ def test_create_document_invalid_path():
 
 
 def test_get_root_id(complete_xml_path):
-    book_id = tools.get_root_id(str(complete_xml_path))
+    book_id = tools.get_root_id(complete_xml_path)
 
     assert book_id == "glyjor"
 
 
 def test_get_empty(incomplete_xml_path):
-    result = tools.get_empty(str(incomplete_xml_path), "3295p0")
+    result = tools.get_empty(incomplete_xml_path, "3295p0")
 
     assert "gr5peb" in result
     assert "<beat" in result
 
 
+def test_get_empty_none(mixed_xml_path):
+    result = tools.get_empty(mixed_xml_path, "glyjor")
+
+    assert result == "No empty containers found within node glyjor"
+
+
 def test_get_empty_not_found(incomplete_xml_path):
     with pytest.raises(NodeNotFoundError):
-        tools.get_empty(str(incomplete_xml_path), "nonexistent")
+        tools.get_empty(incomplete_xml_path, "nonexistent")
 
 
 def test_get_node(complete_xml_path):
-    result = tools.get_node(str(complete_xml_path), "glyjor")
+    result = tools.get_node(complete_xml_path, "glyjor")
 
     assert "<book" in result
     assert 'id="glyjor"' in result
@@ -51,11 +59,19 @@ def test_get_node(complete_xml_path):
 
 def test_get_node_not_found(complete_xml_path):
     with pytest.raises(NodeNotFoundError):
-        tools.get_node(str(complete_xml_path), "nonexistent")
+        tools.get_node(complete_xml_path, "nonexistent")
+
+
+def test_get_node_after_edit(complete_temp_file):
+    assert 'title="Parker"' in tools.get_node(complete_temp_file, "3295p0")
+
+    tools.edit_node_attributes(complete_temp_file, "3295p0", {"title": "Parkes"})
+
+    assert 'title="Parkes"' in tools.get_node(complete_temp_file, "3295p0")
 
 
 def test_get_subtree(complete_xml_path):
-    result = tools.get_subtree(str(complete_xml_path), "3295p0")
+    result = tools.get_subtree(complete_xml_path, "3295p0")
 
     assert "<chapter" in result
     assert 'id="3295p0"' in result
@@ -66,7 +82,7 @@ def test_get_subtree(complete_xml_path):
 
 
 def test_get_children(complete_xml_path):
-    result = tools.get_children(str(complete_xml_path), "3295p0")
+    result = tools.get_children(complete_xml_path, "3295p0")
 
     assert "<sequence" in result
     assert 'id="104lac"' in result
@@ -77,7 +93,7 @@ def test_get_children(complete_xml_path):
 
 
 def test_get_path(complete_xml_path):
-    result = tools.get_path(str(complete_xml_path), "gr5peb")
+    result = tools.get_path(complete_xml_path, "gr5peb")
 
     assert "<book" in result
     assert "<chapter" in result
@@ -85,314 +101,259 @@ def test_get_path(complete_xml_path):
     assert "<beat" in result
 
 
-def test_get_subtree_full(complete_xml_path):
-    result = tools.get_subtree(str(complete_xml_path), "glyjor", "full")
+@pytest.mark.parametrize(
+    "pruning_level,depth",
+    [("book", 1), ("chapter", 2), ("sequence", 3), ("beat", 4), ("full", 5)],
+)
+def test_get_subtree_pruning(complete_xml_path, pruning_level, depth):
+    result = tools.get_subtree(complete_xml_path, "glyjor", pruning_level)
+
+    tags = ["<book", "<chapter", "<sequence", "<beat", "<paragraph"]
+    for tag in tags[:depth]:
+        assert tag in result
+    for tag in tags[depth:]:
+        assert tag not in result
 
-    assert "<book" in result
-    assert "<chapter" in result
-    assert "<sequence" in result
-    assert "<beat" in result
-    assert "<paragraph" in result
 
+@pytest.mark.parametrize(
+    "pruning_level,comments",
+    [("book", 0), ("chapter", 0), ("sequence", 0), ("beat", 2), ("full", 7)],
+)
+def test_get_subtree_pruning_comments(mixed_xml_path, pruning_level, comments):
+    result = tools.get_subtree(mixed_xml_path, "glyjor", pruning_level)
 
-def test_get_subtree_beat(complete_xml_path):
-    result = tools.get_subtree(str(complete_xml_path), "glyjor", "beat")
+    # Comments inside pruned nodes are removed along with their siblings
+    assert result.count("<!--") == comments
 
-    assert "<book" in result
-    assert "<chapter" in result
-    assert "<sequence" in result
-    assert "<beat" in result
-    assert "<paragraph" not in result
+
+@pytest.mark.parametrize("pruning_level", ["book", "beat", "full"])
+def test_get_subtree_paragraph(complete_xml_path, pruning_level):
+    result = tools.get_subtree(complete_xml_path, "ef955x", pruning_level)
+
+    assert '<paragraph id="ef955x"' in result
+    assert "One instant, I pray of you." in result
 
 
 def test_get_subtree_invalid_level(complete_xml_path):
     with pytest.raises(InvalidAttributeError):
-        tools.get_subtree(str(complete_xml_path), "glyjor", "invalid")
+        tools.get_subtree(complete_xml_path, "glyjor", "invalid")
 
 
-def test_create_chapter(temp_file, complete_xml_path):
-    with open(temp_file, "w") as f:
-        f.write(open(complete_xml_path).read())
-
+def test_create_chapter(complete_temp_file):
     tools.create_chapter(
-        temp_file, "glyjor", "Test Chapter", "Test summary", "test_char"
+        complete_temp_file, "glyjor", "Test Chapter", "Test summary", "test_char"
     )
 
-    tree = tools.hnpx.parse_document(temp_file)
-    chapters = tree.xpath("//chapter")
+    tree = tools.hnpx.parse_document(complete_temp_file, readonly=True)
+    chapters = tree.getroot().findall("chapter")
     assert len(chapters) == 2
     assert chapters[1].get("title") == "Test Chapter"
     assert chapters[1].get("pov") == "test_char"
 
 
-def test_create_sequence(temp_file, complete_xml_path):
-    with open(temp_file, "w") as f:
-        f.write(open(complete_xml_path).read())
-
+def test_create_sequence(complete_temp_file):
     tools.create_sequence(
-        temp_file, "3295p0", "Test Location", "Test summary", "morning", "test_char"
+        complete_temp_file,
+        "3295p0",
+        "Test Location",
+        "Test summary",
+        "morning",
+        "test_char",
     )
 
-    tree = tools.hnpx.parse_document(temp_file)
-    sequences = tree.xpath("//sequence")
+    tree = tools.hnpx.parse_document(complete_temp_file, readonly=True)
+    sequences = tree.getroot().findall("chapter/sequence")
     assert len(sequences) == 2
     assert sequences[1].get("location") == "Test Location"
     assert sequences[1].get("time") == "morning"
     assert sequences[1].get("pov") == "test_char"
 
 
-def test_create_beat(temp_file, complete_xml_path):
-    with open(temp_file, "w") as f:
-        f.write(open(complete_xml_path).read())
-
-    tools.create_beat(temp_file, "104lac", "Test beat summary")
+def test_create_beat(complete_temp_file):
+    tools.create_beat(complete_temp_file, "104lac", "Test beat summary")
 
-    tree = tools.hnpx.parse_document(temp_file)
-    beats = tree.xpath("//beat")
+    tree = tools.hnpx.parse_document(complete_temp_file, readonly=True)
+    beats = tree.getroot().findall("chapter/sequence/beat")
     assert len(beats) == 2
 
 
-def test_create_paragraph(temp_file, complete_xml_path):
-    with open(temp_file, "w") as f:
-        f.write(open(complete_xml_path).read())
-
+def test_create_paragraph(complete_temp_file):
     tools.create_paragraph(
-        temp_file,
+        complete_temp_file,
         "gr5peb",
         "Test text",
         "dialogue",
         "test_char",
     )
 
-    tree = tools.hnpx.parse_document(temp_file)
-    paragraphs = tree.xpath("//paragraph")
+    tree = tools.hnpx.parse_document(complete_temp_file, readonly=True)
+    paragraphs = tree.getroot().findall("chapter/sequence/beat/paragraph")
     assert len(paragraphs) == 6
     assert paragraphs[5].get("mode") == "dialogue"
     assert paragraphs[5].get("char") == "test_char"
     assert paragraphs[5].text == "Test text"
 
 
-def test_create_paragraph_dialogue_missing_char(temp_file, complete_xml_path):
-    with open(temp_file, "w") as f:
-        f.write(open(complete_xml_path).read())
-
-    with pytest.raises(MissingAttributeError):
-        tools.create_paragraph(temp_file, "gr5peb", "Test text", "dialogue")
-
-
-def test_edit_node_attributes(complete_xml_path, temp_file):
-    with open(temp_file, "w") as f:
-        f.write(open(complete_xml_path).read())
-
+def test_edit_node_attributes(complete_temp_file):
     tools.edit_node_attributes(
-        temp_file, "3295p0", {"title": "New Title", "pov": "new_pov"}
+        complete_temp_file, "3295p0", {"title": "New Title", "pov": "new_pov"}
     )
 
-    tree = tools.hnpx.parse_document(temp_file)
+    tree = tools.hnpx.parse_document(complete_temp_file, readonly=True)
     chapter = tools.hnpx.find_node(tree, "3295p0")
     assert chapter.get("title") == "New Title"
     assert chapter.get("pov") == "new_pov"
 
 
-def test_edit_node_attributes_invalid_id(complete_xml_path, temp_file):
-    with open(temp_file, "w") as f:
-        f.write(open(complete_xml_path).read())
-
-    with pytest.raises(NodeNotFoundError):
-        tools.edit_node_attributes(temp_file, "nonexistent", {"title": "New Title"})
-
-
-def test_edit_node_attributes_cannot_modify_id(complete_xml_path, temp_file):
-    with open(temp_file, "w") as f:
-        f.write(open(complete_xml_path).read())
-
-    with pytest.raises(InvalidOperationError):
-        tools.edit_node_attributes(temp_file, "3295p0", {"id": "new_id"})
-
-
-def test_remove_nodes_single(complete_xml_path, temp_file):
-    with open(temp_file, "w") as f:
-        f.write(open(complete_xml_path).read())
-
-    tools.remove_nodes(temp_file, ["gr5peb"])
+def test_remove_nodes_single(complete_temp_file):
+    tools.remove_nodes(complete_temp_file, ["gr5peb"])
 
-    tree = tools.hnpx.parse_document(temp_file)
+    tree = tools.hnpx.parse_document(complete_temp_file, readonly=True)
     beat = tools.hnpx.find_node(tree, "gr5peb")
     assert beat is None
 
 
-def test_remove_nodes_multiple(complete_xml_path, temp_file):
-    with open(temp_file, "w") as f:
-        f.write(open(complete_xml_path).read())
+def test_remove_nodes_multiple(complete_temp_file):
+    tools.remove_nodes(complete_temp_file, ["gr5peb", "104lac"])
 
-    tools.remove_nodes(temp_file, ["gr5peb", "104lac"])
-
-    tree = tools.hnpx.parse_document(temp_file)
+    tree = tools.hnpx.parse_document(complete_temp_file, readonly=True)
     beat = tools.hnpx.find_node(tree, "gr5peb")
     sequence = tools.hnpx.find_node(tree, "104lac")
     assert beat is None
     assert sequence is None
 
 
-def test_remove_nodes_not_found(complete_xml_path, temp_file):
-    with open(temp_file, "w") as f:
-        f.write(open(complete_xml_path).read())
-
-    with pytest.raises(NodeNotFoundError):
-        tools.remove_nodes(temp_file, ["nonexistent"])
-
-
-def test_remove_nodes_book(complete_xml_path, temp_file):
-    with open(temp_file, "w") as f:
-        f.write(open(complete_xml_path).read())
-
-    with pytest.raises(InvalidOperationError):
-        tools.remove_nodes(temp_file, ["glyjor"])
-
-
-def test_reorder_children(complete_xml_path, temp_file):
-    with open(temp_file, "w") as f:
-        f.write(open(complete_xml_path).read())
-
-    tree = tools.hnpx.parse_document(temp_file)
+def test_reorder_children(complete_temp_file):
+    tree = tools.hnpx.parse_document(complete_temp_file)
     beat = tools.hnpx.find_node(tree, "gr5peb")
-    paragraphs = [child for child in beat if child.tag != "summary"]
-    paragraph_ids = [p.get("id") for p in paragraphs]
+    paragraph_ids = [p.get("id") for p in beat.iterchildren("paragraph")]
 
-    reversed_ids = list(reversed(paragraph_ids))
+    reversed_ids = paragraph_ids[::-1]
 
-    tools.reorder_children(temp_file, "gr5peb", reversed_ids)
+    tools.reorder_children(complete_temp_file, "gr5peb", reversed_ids)
 
-    new_tree = tools.hnpx.parse_document(temp_file)
+    new_tree = tools.hnpx.parse_document(complete_temp_file, readonly=True)
     new_beat = tools.hnpx.find_node(new_tree, "gr5peb")
-    new_paragraphs = [child for child in new_beat if child.tag != "summary"]
-    new_paragraph_ids = [p.get("id") for p in new_paragraphs]
+    new_paragraph_ids = [p.get("id") for p in new_beat.iterchildren("paragraph")]
 
     assert new_paragraph_ids == reversed_ids
 
 
-def test_reorder_children_invalid_ids(complete_xml_path, temp_file):
-    with open(temp_file, "w") as f:
-        f.write(open(complete_xml_path).read())
-
-    with pytest.raises(InvalidOperationError):
-        tools.reorder_children(temp_file, "gr5peb", ["nonexistent1", "nonexistent2"])
+def test_edit_summary(complete_temp_file):
+    tools.edit_summary(complete_temp_file, "3295p0", "New summary text")
 
-
-def test_edit_summary(complete_xml_path, temp_file):
-    with open(temp_file, "w") as f:
-        f.write(open(complete_xml_path).read())
-
-    tools.edit_summary(temp_file, "3295p0", "New summary text")
-
-    tree = tools.hnpx.parse_document(temp_file)
+    tree = tools.hnpx.parse_document(complete_temp_file, readonly=True)
     chapter = tools.hnpx.find_node(tree, "3295p0")
     summary = chapter.find("summary")
     assert summary.text == "New summary text"
 
 
-def test_edit_summary_not_found(complete_xml_path, temp_file):
-    with open(temp_file, "w") as f:
-        f.write(open(complete_xml_path).read())
-
-    with pytest.raises(NodeNotFoundError):
-        tools.edit_summary(temp_file, "nonexistent", "New summary text")
-
-
-def test_edit_paragraph_text(complete_xml_path, temp_file):
-    with open(temp_file, "w") as f:
-        f.write(open(complete_xml_path).read())
-
-    tools.edit_paragraph_text(temp_file, "uvxuqh", "New paragraph text")
+def test_edit_paragraph_text(complete_temp_file):
+    tools.edit_paragraph_text(complete_temp_file, "uvxuqh", "New paragraph text")
 
-    tree = tools.hnpx.parse_document(temp_file)
+    tree = tools.hnpx.parse_document(complete_temp_file, readonly=True)
     paragraph = tools.hnpx.find_node(tree, "uvxuqh")
     assert paragraph.text == "New paragraph text"
 
 
-def test_edit_paragraph_text_not_found(complete_xml_path, temp_file):
-    with open(temp_file, "w") as f:
-        f.write(open(complete_xml_path).read())
-
-    with pytest.raises(NodeNotFoundError):
-        tools.edit_paragraph_text(temp_file, "nonexistent", "New text")
+def test_move_nodes_single(complete_temp_file):
+    tools.move_nodes(complete_temp_file, ["gr5peb"], "104lac")
 
-
-def test_edit_paragraph_text_not_paragraph(complete_xml_path, temp_file):
-    with open(temp_file, "w") as f:
-        f.write(open(complete_xml_path).read())
-
-    with pytest.raises(InvalidOperationError):
-        tools.edit_paragraph_text(temp_file, "3295p0", "New text")
-
-
-def test_move_nodes_single(complete_xml_path, temp_file):
-    with open(temp_file, "w") as f:
-        f.write(open(complete_xml_path).read())
-
-    tools.move_nodes(temp_file, ["gr5peb"], "104lac")
-
-    tree = tools.hnpx.parse_document(temp_file)
+    tree = tools.hnpx.parse_document(complete_temp_file, readonly=True)
     beat = tools.hnpx.find_node(tree, "gr5peb")
     parent = beat.getparent()
     assert parent.get("id") == "104lac"
 
 
 def test_move_nodes_multiple(mixed_xml_path, temp_file):
-    with open(temp_file, "w") as f:
-        f.write(open(mixed_xml_path).read())
+    shutil.copyfile(mixed_xml_path, temp_file)
 
     child_ids = ["76w5gp", "9zgowk"]
     tools.move_nodes(temp_file, child_ids, "en92qn")
 
-    new_tree = tools.hnpx.parse_document(temp_file)
+    new_tree = tools.hnpx.parse_document(temp_file, readonly=True)
     parent2 = tools.hnpx.find_node(new_tree, "en92qn")
-    children2 = [child.get("id") for child in parent2 if child.tag != "summary"]
+    children2 = [child.get("id") for child in parent2.iterchildren("paragraph")]
     assert children2 == ["ybqiqe", "tmwumx"] + child_ids
 
     parent1 = tools.hnpx.find_node(new_tree, "wyxbo0")
-    children1 = [child.get("id") for child in parent1 if child.tag != "summary"]
+    children1 = [child.get("id") for child in parent1.iterchildren("paragraph")]
     assert children1 == ["zexcv5"]
 
 
-def test_move_nodes_not_found(complete_xml_path, temp_file):
-    with open(temp_file, "w") as f:
-        f.write(open(complete_xml_path).read())
-
-    with pytest.raises(NodeNotFoundError):
-        tools.move_nodes(temp_file, ["nonexistent"], "104lac")
-
-
-def test_move_nodes_invalid_hierarchy(complete_xml_path, temp_file):
-    with open(temp_file, "w") as f:
-        f.write(open(complete_xml_path).read())
+def test_remove_node_children(complete_temp_file):
+    tools.remove_node_children(complete_temp_file, "gr5peb")
 
-    with pytest.raises(InvalidHierarchyError):
-        tools.move_nodes(temp_file, ["uvxuqh"], "glyjor")
-
-
-def test_remove_node_children(complete_xml_path, temp_file):
-    with open(temp_file, "w") as f:
-        f.write(open(complete_xml_path).read())
-
-    tools.remove_node_children(temp_file, "gr5peb")
-
-    tree = tools.hnpx.parse_document(temp_file)
+    tree = tools.hnpx.parse_document(complete_temp_file, readonly=True)
     beat = tools.hnpx.find_node(tree, "gr5peb")
-    children = [child for child in beat if child.tag != "summary"]
-    assert len(children) == 0
-
-
-def test_remove_node_children_not_found(complete_xml_path, temp_file):
-    with open(temp_file, "w") as f:
-        f.write(open(complete_xml_path).read())
-
-    with pytest.raises(NodeNotFoundError):
-        tools.remove_node_children(temp_file, "nonexistent")
+    assert tools.hnpx.get_child_count(beat) == 0
+
+
+def test_remove_node_children_comments(mixed_xml_path, temp_file):
+    shutil.copyfile(mixed_xml_path, temp_file)
+
+    result = tools.remove_node_children(temp_file, "tkzmbn")
+
+    assert result == "Removed 1 children from node tkzmbn"
+    tree = tools.hnpx.parse_document(temp_file, readonly=True)
+    beat = tools.hnpx.find_node(tree, "tkzmbn")
+    assert [child.tag for child in beat] == ["summary"]
+
+
+@pytest.mark.parametrize(
+    "operation,args,exception",
+    [
+        (
+            tools.create_paragraph,
+            ("gr5peb", "Test text", "dialogue"),
+            MissingAttributeError,
+        ),
+        (
+            tools.edit_node_attributes,
+            ("nonexistent", {"title": "x"}),
+            NodeNotFoundError,
+        ),
+        (
+            tools.edit_node_attributes,
+            ("3295p0", {"id": "new_id"}),
+            InvalidOperationError,
+        ),
+        (tools.remove_nodes, (["nonexistent"],), NodeNotFoundError),
+        (tools.remove_nodes, (["glyjor"],), InvalidOperationError),
+        (
+            tools.reorder_children,
+            ("gr5peb", ["nonexistent1", "nonexistent2"]),
+            InvalidOperationError,
+        ),
+        (tools.edit_summary, ("nonexistent", "New summary text"), NodeNotFoundError),
+        (tools.edit_paragraph_text, ("nonexistent", "New text"), NodeNotFoundError),
+        (tools.edit_paragraph_text, ("3295p0", "New text"), InvalidOperationError),
+        (tools.move_nodes, (["nonexistent"], "104lac"), NodeNotFoundError),
+        (tools.move_nodes, (["uvxuqh"], "glyjor"), InvalidHierarchyError),
+        (tools.remove_node_children, ("nonexistent",), NodeNotFoundError),
+    ],
+    ids=[
+        "create_paragraph_dialogue_missing_char",
+        "edit_node_attributes_not_found",
+        "edit_node_attributes_cannot_modify_id",
+        "remove_nodes_not_found",
+        "remove_nodes_book",
+        "reorder_children_invalid_ids",
+        "edit_summary_not_found",
+        "edit_paragraph_text_not_found",
+        "edit_paragraph_text_not_paragraph",
+        "move_nodes_not_found",
+        "move_nodes_invalid_hierarchy",
+        "remove_node_children_not_found",
+    ],
+)
+def test_modification_errors(complete_temp_file, operation, args, exception):
+    with pytest.raises(exception):
+        operation(complete_temp_file, *args)
 
 
 def test_render_node(complete_xml_path):
-    result = tools.render_node(str(complete_xml_path), "gr5peb")
+    result = tools.render_node(complete_xml_path, "gr5peb")
 
     assert "On arrival at The Larches" in result
     assert (
@@ -402,7 +363,7 @@ def test_render_node(complete_xml_path):
 
 
 def test_render_node_with_ids(complete_xml_path):
-    result = tools.render_node(str(complete_xml_path), "gr5peb", show_ids=True)
+    result = tools.render_node(complete_xml_path, "gr5peb", show_ids=True)
 
     assert (
         "[uvxuqh] On arrival at The Larches, we were informed that Parker was already there awaiting our return."
@@ -416,12 +377,11 @@ def test_render_node_with_ids(complete_xml_path):
 
 def test_render_node_not_found(complete_xml_path):
     with pytest.raises(NodeNotFoundError):
-        tools.render_node(str(complete_xml_path), "nonexistent")
+        tools.render_node(complete_xml_path, "nonexistent")
 
 
 def test_unicode_xml_output(unicode_xml_path, temp_file):
-    with open(temp_file, "w", encoding="utf-8") as f:
-        f.write(open(unicode_xml_path, encoding="utf-8").read())
+    shutil.copyfile(unicode_xml_path, temp_file)
 
     result = tools.get_node(temp_file, "c8e4d1")
 